@@ -1,15 +1,37 @@
 import fitz  # PyMuPDF
 import numpy as np
 from collections import defaultdict, Counter
-from uuid import uuid4
+from functools import lru_cache
+from operator import itemgetter
+import itertools
 import logging
+import multiprocessing
+import os
 import re
+import sys
 from typing import List, Dict, Any, Optional, Tuple
+from utils import njit
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Only text blocks are used, so skip image extraction inside MuPDF
+TEXTPAGE_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+# Font name fragments that mark a bold face, matched case-insensitively
+# ('semibold', 'demibold' and 'extrabold' are all caught by 'bold')
+_BOLD_RE = re.compile(r'bold|heavy|black', re.IGNORECASE)
+
+# Longer strings are rarely repeated verbatim, so only short ones are cached
+_TEXT_CASE_CACHE_MAX_LEN = 64
+
+# Paragraph ids are sequential per process (cheaper than uuid4, which hits os.urandom)
+_paragraph_ids = itertools.count()
+
+# Interned font-name sets, shared by every line that uses the same fonts
+_FONT_SET_CACHE: Dict[Tuple[str, ...], frozenset] = {}
+
 class PDFLayoutExtractor:
     def __init__(self, 
                  vertical_spacing_threshold: float = 15.0,
@@ -36,13 +58,24 @@ class PDFLayoutExtractor:
         }
         self.bold_keywords = ['bold', 'heavy', 'black', 'semibold', 'demibold', 'extrabold']
 
-def extract_layout_text(pdf_path: str, extractor: Optional[PDFLayoutExtractor] = None) -> List[Dict[str, Any]]:
+DEFAULT_NUM_WORKERS = min(os.cpu_count() or 1, 4)
+
+# Below this many pages, pool start-up costs more than it saves
+MIN_PARALLEL_PAGES = 32
+
+def extract_layout_text(pdf_path: str, extractor: Optional[PDFLayoutExtractor] = None,
+                        num_workers: int = DEFAULT_NUM_WORKERS,
+                        doc: Optional[fitz.Document] = None) -> List[Dict[str, Any]]:
     """
     Extract layout text from PDF with improved error handling and strict paragraph grouping.
     
     Args:
         pdf_path: Path to the PDF file
         extractor: Optional PDFLayoutExtractor instance with custom settings
+        num_workers: Number of worker processes used to extract pages (1 disables multiprocessing)
+        doc: Optional already-open document for pdf_path (e.g. from loader.open_pdf);
+            it is left open for the caller and extracted serially, since pool workers
+            re-open the file and would lose authentication or in-memory edits
         
     Returns:
         List of paragraph dictionaries with extracted features
@@ -56,8 +89,10 @@ def extract_layout_text(pdf_path: str, extractor: Optional[PDFLayoutExtractor] =
         return []
     
     # Try to open document with comprehensive error handling
+    owns_doc = doc is None
     try:
-        doc = fitz.open(pdf_path)
+        if owns_doc:
+            doc = fitz.open(pdf_path)
         if doc.is_encrypted:
             logger.error("PDF is password protected")
             return []
@@ -69,31 +104,28 @@ def extract_layout_text(pdf_path: str, extractor: Optional[PDFLayoutExtractor] =
         return []
     
     try:
-        return _extract_paragraphs_from_document(doc, extractor)
+        # Only a document opened here is guaranteed to match the file on disk
+        return _extract_paragraphs_from_document(doc, extractor, num_workers if owns_doc else 1)
     except Exception as e:
         logger.error(f"Error during text extraction: {e}")
         return []
     finally:
-        # Ensure document is always closed
-        try:
-            doc.close()
-        except:
-            pass
+        # Ensure a document opened here is always closed
+        if owns_doc:
+            try:
+                doc.close()
+            except:
+                pass
 
-def _extract_paragraphs_from_document(doc: fitz.Document, extractor: PDFLayoutExtractor) -> List[Dict[str, Any]]:
+def _extract_paragraphs_from_document(doc: fitz.Document, extractor: PDFLayoutExtractor,
+                                      num_workers: int = 1) -> List[Dict[str, Any]]:
     """Extract paragraphs from all pages in the document."""
     paragraphs = []
     all_font_sizes = []
     
-    for page_num in range(len(doc)):
-        try:
-            page = doc[page_num]
-            page_paragraphs, page_font_sizes = _extract_page_paragraphs(page, page_num, extractor)
-            paragraphs.extend(page_paragraphs)
-            all_font_sizes.extend(page_font_sizes)
-        except Exception as e:
-            logger.warning(f"Error processing page {page_num}: {e}")
-            continue
+    for page_paragraphs, page_font_sizes in _extract_all_pages(doc, extractor, num_workers):
+        paragraphs.extend(page_paragraphs)
+        all_font_sizes.extend(page_font_sizes)
     
     if not all_font_sizes:
         logger.warning("No font sizes found in document")
@@ -105,14 +137,64 @@ def _extract_paragraphs_from_document(doc: fitz.Document, extractor: PDFLayoutEx
     # Add relative font size to paragraphs
     for para in paragraphs:
         fs = para.get("avg_font_size", 0)
-        para["relative_font_size"] = font_size_ranks.get(fs, 0)
+        para["relative_font_size"] = font_size_ranks.get(font_size_key(fs), 0)
     
     return paragraphs
 
+def _extract_all_pages(doc: fitz.Document, extractor: PDFLayoutExtractor,
+                       num_workers: int) -> List[Tuple[List[Dict], List[float]]]:
+    """Extract every page, in page order, using a process pool when worthwhile."""
+    workers = min(num_workers, doc.page_count)
+    # Workers re-open the file themselves, so in-memory documents stay serial
+    if workers > 1 and doc.name and doc.page_count >= MIN_PARALLEL_PAGES:
+        try:
+            # Compile the grouping kernel here so forked workers inherit it
+            # instead of each loading it from numba's cache
+            _warm_group_runs()
+            with multiprocessing.Pool(workers, initializer=_init_page_worker,
+                                      initargs=(doc.name, extractor)) as pool:
+                results = dict(pool.imap_unordered(_extract_page_worker, range(doc.page_count)))
+            pages = [results[page_num] for page_num in range(doc.page_count)]
+            # Worker counters overlap, so renumber paragraphs from this process
+            for page_paragraphs, _ in pages:
+                for para in page_paragraphs:
+                    para["paragraph_id"] = _next_paragraph_id()
+            return pages
+        except Exception as e:
+            logger.warning(f"Parallel page extraction failed, falling back to serial: {e}")
+    
+    return [_extract_page_safe(doc, page_num, extractor) for page_num in range(len(doc))]
+
+# Per-process state for the page extraction pool
+_worker_doc: Optional[fitz.Document] = None
+_worker_extractor: Optional[PDFLayoutExtractor] = None
+
+def _init_page_worker(pdf_path: str, extractor: PDFLayoutExtractor) -> None:
+    """Open the document once per worker process (fitz documents cannot be shared)."""
+    global _worker_doc, _worker_extractor
+    _worker_doc = fitz.open(pdf_path)
+    _worker_extractor = extractor
+
+def _extract_page_worker(page_num: int) -> Tuple[int, Tuple[List[Dict], List[float]]]:
+    """Pool task: extract a single page from the worker's own document."""
+    return page_num, _extract_page_safe(_worker_doc, page_num, _worker_extractor)
+
+def _extract_page_safe(doc: fitz.Document, page_num: int, extractor: PDFLayoutExtractor) -> Tuple[List[Dict], List[float]]:
+    """Extract a single page, logging and skipping it on failure."""
+    try:
+        page = doc[page_num]
+        return _extract_page_paragraphs(page, page_num, extractor)
+    except Exception as e:
+        logger.warning(f"Error processing page {page_num}: {e}")
+        return [], []
+
 def _extract_page_paragraphs(page: fitz.Page, page_num: int, extractor: PDFLayoutExtractor) -> Tuple[List[Dict], List[float]]:
     """Extract paragraphs from a single page."""
     try:
-        page_dict = page.get_text("dict")
+        # The tuple interfaces (extractBLOCKS/extractWORDS) carry no span font
+        # name or size, which every line needs, so the dict output is required
+        textpage = page.get_textpage(flags=TEXTPAGE_FLAGS)
+        page_dict = textpage.extractDICT()
         if not page_dict or 'blocks' not in page_dict:
             return [], []
     except Exception as e:
@@ -157,45 +239,51 @@ def _process_line(line: Dict, page_num: int, page_rect: fitz.Rect, extractor: PD
     if not spans:
         return None, []
     
-    # Filter and clean spans
-    valid_spans = []
+    # Single pass over the spans: filter, collect text, font info and leftmost x
+    text_parts = []
+    font_sizes = []
+    fonts = []
+    min_x = None
+    
     for span in spans:
         if not isinstance(span, dict):
             continue
         text = span.get('text', '').strip()
-        if text and len(text) > 1:  # Filter out single characters and empty text
-            valid_spans.append(span)
-    
-    if not valid_spans:
-        return None, []
-    
-    # Extract text
-    line_text = " ".join([span['text'].strip() for span in valid_spans])
-    if not line_text or len(line_text) <= 1:
-        return None, []
-    
-    # Extract font information with error handling
-    font_sizes = []
-    fonts = []
-    
-    for span in valid_spans:
+        if not text or len(text) <= 1:  # Filter out single characters and empty text
+            continue
+        text_parts.append(text)
+        
         try:
-            size = span.get('size', 0)
-            if isinstance(size, (int, float)) and size > 0:
-                font_sizes.append(float(size))
+            size = float(span.get('size', 0))
+            if size > 0:
+                font_sizes.append(size)
             
             font = span.get('font', '')
             if isinstance(font, str) and font:
-                fonts.append(font)
+                # PyMuPDF hands out a fresh string per span; intern the few distinct names
+                fonts.append(sys.intern(font))
         except (TypeError, ValueError):
-            continue
+            pass
+        
+        span_bbox = span.get('bbox')
+        if span_bbox and len(span_bbox) >= 4:
+            try:
+                x = float(span_bbox[0])
+            except (TypeError, ValueError):
+                continue
+            if min_x is None or x < min_x:
+                min_x = x
     
-    if not font_sizes:
+    if not text_parts or not font_sizes:
         return None, []
     
+    line_text = " ".join(text_parts)
+    
     # Calculate font metrics
-    avg_font_size = round(float(np.mean(font_sizes)), 2)
-    is_bold = detect_bold_text(fonts)
+    # Raw floats are kept internally; rounding happens once in aggregate_paragraphs
+    avg_font_size = sum(font_sizes) / len(font_sizes)
+    font_key = tuple(sorted(set(fonts)))
+    is_bold = _detect_bold_fonts(font_key)
     
     # Extract bounding box with validation
     bbox = line.get('bbox')
@@ -210,10 +298,10 @@ def _process_line(line: Dict, page_num: int, page_rect: fitz.Rect, extractor: PD
         return None, []
     
     # Calculate height to font ratio safely
-    height_to_font_ratio = round(height / avg_font_size, 2) if avg_font_size >= extractor.min_font_size else 0.0
+    height_to_font_ratio = height / avg_font_size if avg_font_size >= extractor.min_font_size else 0.0
     
     # Get alignment and text case
-    alignment = get_alignment(valid_spans, page_rect, extractor.alignment_thresholds)
+    alignment = _alignment_from_x(min_x, page_rect, extractor.alignment_thresholds)
     text_case = get_text_case(line_text)
     
     line_features = {
@@ -224,9 +312,10 @@ def _process_line(line: Dict, page_num: int, page_rect: fitz.Rect, extractor: PD
         "is_bold": is_bold,
         "alignment": alignment,
         "text_case": text_case,
-        "font_names": list(set(fonts)),
-        "line_height": round(height, 2),
+        "font_names": _FONT_SET_CACHE.setdefault(font_key, frozenset(font_key)),
+        "line_height": height,
         "height_to_font_ratio": height_to_font_ratio,
+        "line_spacing": 0.0,
         "y0": y0,
         "y1": y1,
         "page_num": page_num
@@ -244,33 +333,30 @@ def detect_bold_text(fonts: List[str]) -> bool:
     if not fonts:
         return False
     
-    bold_keywords = ['bold', 'heavy', 'black', 'semibold', 'demibold', 'extrabold']
-    
-    for font in fonts:
-        if not isinstance(font, str):
-            continue
-        font_lower = font.lower()
-        if any(keyword in font_lower for keyword in bold_keywords):
-            return True
-    
-    return False
+    return _detect_bold_fonts(tuple(sorted(font for font in fonts if isinstance(font, str))))
+
+@lru_cache(maxsize=512)
+def _detect_bold_fonts(fonts: Tuple[str, ...]) -> bool:
+    """Cached bold check keyed by the sorted font names of a line."""
+    return any(_BOLD_RE.search(font) for font in fonts)
+
+def font_size_key(font_size: float) -> int:
+    """Quantize a font size to integer hundredths for exact rank lookups."""
+    return int(font_size * 100 + 0.5)
 
-def build_relative_font_ranks(font_sizes: List[float]) -> Dict[float, int]:
-    """Build relative font size rankings with error handling."""
+def build_relative_font_ranks(font_sizes: List[float]) -> Dict[int, int]:
+    """
+    Build relative font size rankings with error handling.
+    
+    Ranks are keyed by ``font_size_key`` (hundredths of a point), which
+    sidesteps floating point dedup issues without rounding every size.
+    """
     if not font_sizes:
         return {}
     
     try:
-        # Remove duplicates and sort
-        unique_sizes = sorted(set(font_sizes))
-        if not unique_sizes:
-            return {}
-        
-        # Handle floating point precision issues
-        rounded_sizes = [round(fs, 2) for fs in unique_sizes]
-        unique_rounded = sorted(set(rounded_sizes))
-        
-        return {fs: idx for idx, fs in enumerate(unique_rounded)}
+        unique_keys = sorted({font_size_key(fs) for fs in font_sizes})
+        return {key: idx for idx, key in enumerate(unique_keys)}
     except Exception as e:
         logger.warning(f"Error building font ranks: {e}")
         return {}
@@ -280,156 +366,235 @@ def group_into_paragraphs_strict(lines: List[Dict], extractor: PDFLayoutExtracto
     if not lines:
         return []
     
-    # Sort lines by vertical position
+    # Sort lines by vertical position (_process_line always sets both keys)
     try:
-        lines.sort(key=lambda x: (x.get('page_num', 0), x.get('y0', 0)))
+        lines.sort(key=itemgetter('page_num', 'y0'))
     except Exception as e:
         logger.warning(f"Error sorting lines: {e}")
         return []
     
-    paragraphs = []
-    current_para = [lines[0]]
+    # Pull the fields compared below into parallel arrays once per line
+    try:
+        n = len(lines)
+        pages = np.fromiter((l['page_num'] for l in lines), dtype=np.int64, count=n)
+        y0s = np.fromiter((l['y0'] for l in lines), dtype=np.float64, count=n)
+        y1s = np.fromiter((l['y1'] for l in lines), dtype=np.float64, count=n)
+        font_classes = np.fromiter((l['normalized_font_size'] for l in lines), dtype=np.float64, count=n)
+        bolds = np.fromiter((bool(l['is_bold']) for l in lines), dtype=np.bool_, count=n)
+        # _process_line output is already interned; older list-shaped lines are interned here
+        font_sets = [fs if isinstance(fs, frozenset)
+                     else _FONT_SET_CACHE.setdefault(tuple(sorted(set(fs))), frozenset(fs))
+                     for fs in (l['font_names'] for l in lines)]
+    except (KeyError, TypeError, ValueError) as e:
+        logger.warning(f"Malformed line features: {e}")
+        return []
     
-    for i in range(1, len(lines)):
-        try:
-            prev = current_para[-1]
-            curr = lines[i]
-            
-            # Calculate spacing (handle negative spacing for overlapping text)
-            spacing = max(0, curr.get('y0', 0) - prev.get('y1', 0))
-            curr['line_spacing'] = spacing
-            
-            # STRICT MATCHING CONDITIONS
-            same_page = curr.get('page_num') == prev.get('page_num')
-            
-            # Use normalized font sizes for exact matching
-            same_font_class = curr.get('normalized_font_size') == prev.get('normalized_font_size')
-            
-            # Alternative: strict tolerance-based matching
-            # same_font_size = abs(curr.get('font_size', 0) - prev.get('font_size', 0)) <= extractor.font_size_tolerance
-            
-            same_font_weight = curr.get('is_bold') == prev.get('is_bold')
-            same_font_name = bool(set(curr.get('font_names', [])).intersection(set(prev.get('font_names', []))))
-            close_vertically = spacing < extractor.vertical_spacing_threshold
-            
-            # All conditions must match for grouping
-            if (same_page and close_vertically and same_font_class and 
-                same_font_weight and same_font_name):
-                current_para.append(curr)
-            else:
-                # Finalize current paragraph and start new one
-                para = aggregate_paragraph(current_para)
-                if para:
-                    paragraphs.append(para)
-                current_para = [curr]
-                
-        except Exception as e:
-            logger.debug(f"Error processing line {i}: {e}")
-            continue
+    # Interned font sets share an id; empty sets never match anything
+    set_ids = {}
+    font_ids = np.fromiter((set_ids.setdefault(id(fs), len(set_ids)) if fs else -1 for fs in font_sets),
+                           dtype=np.int64, count=n)
     
-    # Don't forget the last paragraph
-    if current_para:
-        para = aggregate_paragraph(current_para)
-        if para:
-            paragraphs.append(para)
+    breaks, check_fonts, spacing = _group_runs(pages, y0s, y1s, font_classes, bolds, font_ids,
+                                               float(extractor.vertical_spacing_threshold))
     
-    return paragraphs
+    # Lines whose font sets differ by identity need an exact overlap check
+    for i in np.flatnonzero(check_fonts).tolist():
+        if font_sets[i].isdisjoint(font_sets[i - 1]):
+            breaks[i] = True
+    
+    starts = np.flatnonzero(breaks).tolist()
+    ends = starts[1:] + [n]
+    return aggregate_paragraphs([lines[start:end] for start, end in zip(starts, ends)], spacing=spacing)
 
-def aggregate_paragraph(lines: List[Dict]) -> Optional[Dict]:
-    """Aggregate lines into a paragraph with comprehensive error handling."""
-    if not lines:
-        return None
+def _warm_group_runs() -> None:
+    """Run _group_runs once on dummy input so it is compiled in this process."""
+    _group_runs(np.zeros(2, dtype=np.int64), np.zeros(2), np.zeros(2), np.zeros(2),
+                np.zeros(2, dtype=np.bool_), np.zeros(2, dtype=np.int64), 0.0)
+
+@njit(cache=True)
+def _group_runs(pages, y0s, y1s, font_classes, bolds, font_ids, threshold):
+    """
+    Find paragraph boundaries in sorted lines.
     
-    try:
-        # Combine text
-        texts = [l.get('text', '') for l in lines if l.get('text')]
-        if not texts:
-            return None
-        
-        para_text = " ".join(texts)
-        if not para_text.strip():
-            return None
-        
-        # Calculate numeric aggregates safely
-        font_sizes = [l.get('font_size', 0) for l in lines if isinstance(l.get('font_size'), (int, float))]
-        normalized_font_sizes = [l.get('normalized_font_size', 0) for l in lines if isinstance(l.get('normalized_font_size'), (int, float))]
-        line_heights = [l.get('line_height', 0) for l in lines if isinstance(l.get('line_height'), (int, float))]
-        ratios = [l.get('height_to_font_ratio', 0) for l in lines if isinstance(l.get('height_to_font_ratio'), (int, float))]
-        spacing_vals = [l.get('line_spacing', 0) for l in lines if isinstance(l.get('line_spacing'), (int, float)) and l.get('line_spacing', 0) > 0]
-        
-        # Calculate averages with fallbacks
-        avg_font_size = round(float(np.mean(font_sizes)), 2) if font_sizes else 0.0
-        avg_normalized_font_size = round(float(np.mean(normalized_font_sizes)), 2) if normalized_font_sizes else 0.0
-        avg_line_height = round(float(np.mean(line_heights)), 2) if line_heights else 0.0
-        avg_ratio = round(float(np.mean(ratios)), 2) if ratios else 0.0
-        avg_spacing = round(float(np.mean(spacing_vals)), 2) if spacing_vals else 0.0
-        
-        # Aggregate font information
-        font_weights = [l.get('is_bold', False) for l in lines]
-        font_names_lists = [l.get('font_names', []) for l in lines]
-        all_font_names = [name for names in font_names_lists for name in names if isinstance(name, str)]
+    A line continues the previous paragraph only when it is on the same page,
+    closer than ``threshold``, in the same normalized font class and weight,
+    and shares at least one font. The font overlap is only decided here when
+    both lines carry the same font-set id; other candidates are flagged for
+    the caller to check.
+    
+    Returns:
+        (breaks, check_fonts, spacing) arrays, one entry per line
+    """
+    n = pages.shape[0]
+    breaks = np.zeros(n, dtype=np.bool_)
+    check_fonts = np.zeros(n, dtype=np.bool_)
+    spacing = np.zeros(n, dtype=np.float64)
+    if n > 0:
+        breaks[0] = True
+    
+    for i in range(1, n):
+        # Calculate spacing (handle negative spacing for overlapping text)
+        gap = y0s[i] - y1s[i - 1]
+        if gap < 0.0:
+            gap = 0.0
+        spacing[i] = gap
         
-        # Get most common values
-        alignments = [l.get('alignment', 'unknown') for l in lines]
-        text_cases = [l.get('text_case', 'Mixed') for l in lines]
+        # Alternative: tolerance-based matching with extractor.font_size_tolerance
+        if (pages[i] != pages[i - 1] or not gap < threshold or
+                font_classes[i] != font_classes[i - 1] or bolds[i] != bolds[i - 1]):
+            breaks[i] = True
+        elif font_ids[i] < 0 or font_ids[i] != font_ids[i - 1]:
+            check_fonts[i] = True
+    
+    return breaks, check_fonts, spacing
+
+def aggregate_paragraph(lines: List[Dict]) -> Optional[Dict]:
+    """Aggregate a single run of lines into a paragraph."""
+    paragraphs = aggregate_paragraphs([lines])
+    return paragraphs[0] if paragraphs else None
+
+def aggregate_paragraphs(runs: List[List[Dict]], spacing: Optional[np.ndarray] = None) -> List[Dict]:
+    """
+    Aggregate runs of lines into paragraphs.
+    
+    Numeric features for every run are computed in one vectorized pass over
+    the flattened lines, using the run start offsets with ``np.*.reduceat``.
+    
+    Args:
+        runs: Lists of consecutive lines, one list per paragraph
+        spacing: Optional spacing above each line of the flattened runs;
+            read from each line's ``line_spacing`` when omitted
         
-        most_common_alignment = most_common(alignments)
-        most_common_text_case = most_common(text_cases)
-        most_common_font_names = most_common([tuple(sorted(names)) for names in font_names_lists if names])
+    Returns:
+        List of paragraph dictionaries (runs without text are dropped)
+    """
+    runs = [run for run in runs if run]
+    if not runs:
+        return []
+    
+    try:
+        lines = [l for run in runs for l in run]
+        n = len(lines)
+        counts = np.fromiter((len(run) for run in runs), dtype=np.intp, count=len(runs))
+        starts = np.zeros_like(counts)
+        np.cumsum(counts[:-1], out=starts[1:])
         
-        # Calculate bounding box
-        bboxes = [l.get('bbox', []) for l in lines if l.get('bbox') and len(l.get('bbox', [])) >= 4]
-        if bboxes:
-            try:
-                bbox = [
-                    min(bbox[0] for bbox in bboxes),
-                    min(bbox[1] for bbox in bboxes),
-                    max(bbox[2] for bbox in bboxes),
-                    max(bbox[3] for bbox in bboxes)
-                ]
-            except (TypeError, ValueError, IndexError):
-                bbox = [0, 0, 0, 0]
-        else:
-            bbox = [0, 0, 0, 0]
+        def column(key: str) -> np.ndarray:
+            return np.fromiter((l[key] for l in lines), dtype=np.float64, count=n)
         
-        # Calculate bold ratio
-        bold_ratio = round(sum(font_weights) / len(font_weights), 2) if font_weights else 0.0
+        # Calculate numeric aggregates for all runs at once
+        font_sizes = column('font_size')
+        avg_font_sizes = np.add.reduceat(font_sizes, starts) / counts
+        avg_normalized_font_sizes = np.add.reduceat(column('normalized_font_size'), starts) / counts
+        avg_line_heights = np.add.reduceat(column('line_height'), starts) / counts
+        avg_ratios = np.add.reduceat(column('height_to_font_ratio'), starts) / counts
         
-        # Check for consistent formatting within paragraph
-        font_size_variance = round(float(np.var(font_sizes)), 2) if len(font_sizes) > 1 else 0.0
+        # Only positive spacing contributes to the spacing average
+        if spacing is None:
+            spacing = column('line_spacing')
+        positive = spacing > 0
+        spacing_sums = np.add.reduceat(np.where(positive, spacing, 0.0), starts)
+        spacing_counts = np.add.reduceat(positive.astype(np.intp), starts)
+        avg_spacings = np.divide(spacing_sums, spacing_counts,
+                                 out=np.zeros_like(spacing_sums), where=spacing_counts > 0)
         
-        return {
-            "paragraph_id": f"p_{uuid4().hex[:8]}",
-            "page_num": lines[0].get("page_num", -1),
-            "text": para_text,
-            "avg_font_size": avg_font_size,
-            "normalized_font_size": avg_normalized_font_size,
-            "font_size_variance": font_size_variance,
-            "avg_line_height": avg_line_height,
-            "avg_height_to_font_ratio": avg_ratio,
-            "line_spacing_avg": avg_spacing,
-            "bbox": bbox,
-            "is_bold": all(font_weights) and len(font_weights) > 0,
-            "bold_ratio": bold_ratio,
-            "is_upper": para_text.isupper(),
-            "alignment": most_common_alignment or "unknown",
-            "line_count": len(lines),
-            "font_names": list(set(all_font_names)),
-            "primary_font_family": list(most_common_font_names) if most_common_font_names else [],
-            "text_case": most_common_text_case or "Mixed",
-            "length": len(para_text),
-            "is_homogeneous": font_size_variance < 0.1  # Flag for consistent formatting
-        }
+        # Two-pass variance to check for consistent formatting within paragraph
+        deviations = font_sizes - np.repeat(avg_font_sizes, counts)
+        variances = np.where(counts > 1, np.add.reduceat(deviations * deviations, starts) / counts, 0.0)
         
+        # Bold counts and bounding box union per run
+        bold_counts = np.add.reduceat(
+            np.fromiter((l['is_bold'] for l in lines), dtype=np.intp, count=n), starts)
+        bboxes = np.array([l['bbox'][:4] for l in lines], dtype=np.float64)
+        x0s = np.minimum.reduceat(bboxes[:, 0], starts)
+        y0s = np.minimum.reduceat(bboxes[:, 1], starts)
+        x1s = np.maximum.reduceat(bboxes[:, 2], starts)
+        y1s = np.maximum.reduceat(bboxes[:, 3], starts)
     except Exception as e:
-        logger.warning(f"Error aggregating paragraph: {e}")
-        return None
+        logger.warning(f"Error aggregating paragraphs: {e}")
+        return []
+    
+    numeric = zip(avg_font_sizes.tolist(), avg_normalized_font_sizes.tolist(), avg_line_heights.tolist(),
+                  avg_ratios.tolist(), avg_spacings.tolist(), variances.tolist(), bold_counts.tolist(),
+                  x0s.tolist(), y0s.tolist(), x1s.tolist(), y1s.tolist())
+    
+    paragraphs = []
+    for run, (avg_font_size, avg_normalized_font_size, avg_line_height, avg_ratio, avg_spacing,
+              variance, bold_count, x0, y0, x1, y1) in zip(runs, numeric):
+        try:
+            # Combine text
+            texts = [l['text'] for l in run if l['text']]
+            if not texts:
+                continue
+            
+            para_text = " ".join(texts)
+            if not para_text.strip():
+                continue
+            
+            # Count alignment, text case and font family in a single pass
+            alignment_counts = Counter()
+            text_case_counts = Counter()
+            font_family_counts = Counter()
+            all_font_names = set()
+            for l in run:
+                alignment_counts[l['alignment']] += 1
+                text_case_counts[l['text_case']] += 1
+                names = l['font_names']
+                if names:
+                    font_family_counts[tuple(sorted(names))] += 1
+                    all_font_names.update(names)
+            
+            most_common_alignment = _top(alignment_counts)
+            most_common_text_case = _top(text_case_counts)
+            most_common_font_names = _top(font_family_counts)
+            
+            font_size_variance = round(variance, 2)
+            
+            paragraphs.append({
+                "paragraph_id": _next_paragraph_id(),
+                "page_num": run[0].get("page_num", -1),
+                "text": para_text,
+                "avg_font_size": round(avg_font_size, 2),
+                "normalized_font_size": round(avg_normalized_font_size, 2),
+                "font_size_variance": font_size_variance,
+                "avg_line_height": round(avg_line_height, 2),
+                "avg_height_to_font_ratio": round(avg_ratio, 2),
+                "line_spacing_avg": round(avg_spacing, 2),
+                "bbox": [x0, y0, x1, y1],
+                "is_bold": bold_count == len(run),
+                "bold_ratio": round(bold_count / len(run), 2),
+                "is_upper": para_text.isupper(),
+                "alignment": most_common_alignment or "unknown",
+                "line_count": len(run),
+                "font_names": list(all_font_names),
+                "primary_font_family": list(most_common_font_names) if most_common_font_names else [],
+                "text_case": most_common_text_case or "Mixed",
+                "length": len(para_text),
+                "is_homogeneous": font_size_variance < 0.1  # Flag for consistent formatting
+            })
+            
+        except Exception as e:
+            logger.warning(f"Error aggregating paragraph: {e}")
+            continue
+    
+    return paragraphs
 
 def get_text_case(text: str) -> str:
     """Determine text case with error handling."""
     if not isinstance(text, str) or not text:
         return "Mixed"
     
+    if len(text) <= _TEXT_CASE_CACHE_MAX_LEN:
+        return _cached_text_case(text)
+    return _text_case(text)
+
+@lru_cache(maxsize=4096)
+def _cached_text_case(text: str) -> str:
+    """Cached text case lookup for short, frequently repeated strings."""
+    return _text_case(text)
+
+def _text_case(text: str) -> str:
+    """Classify the case of a non-empty string."""
     try:
         if text.isupper():
             return "UPPER"
@@ -456,10 +621,18 @@ def get_alignment(spans: List[Dict], page_rect: fitz.Rect, thresholds: Dict[str,
                 except (TypeError, ValueError):
                     continue
         
-        if not x_coords:
-            return "unknown"
-        
-        x0 = min(x_coords)
+        return _alignment_from_x(min(x_coords) if x_coords else None, page_rect, thresholds)
+            
+    except Exception as e:
+        logger.debug(f"Error determining alignment: {e}")
+        return "unknown"
+
+def _alignment_from_x(x0: Optional[float], page_rect: fitz.Rect, thresholds: Dict[str, float]) -> str:
+    """Classify alignment from the leftmost x coordinate of a line."""
+    if x0 is None or not page_rect:
+        return "unknown"
+    
+    try:
         page_width = page_rect.width
         
         if page_width <= 0:
@@ -497,6 +670,15 @@ def most_common(lst: List) -> Any:
     except Exception:
         return None
 
+def _next_paragraph_id() -> str:
+    """Return the next process-unique paragraph id."""
+    return f"p_{next(_paragraph_ids):08x}"
+
+def _top(counter: Counter) -> Any:
+    """Most common non-None key of a counter (first seen wins ties)."""
+    counter.pop(None, None)
+    return counter.most_common(1)[0][0] if counter else None
+
 # Convenience function for backward compatibility
 def group_into_paragraphs(lines: List[Dict], extractor: PDFLayoutExtractor) -> List[Dict]:
     """Wrapper function that calls the strict grouping method."""
@@ -1,43 +1,193 @@
-import json
+import asyncio
 import os
 import numpy as np
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 import logging
+import re
+from utils import load_json, dump_json, loads_json, dumps_json, njit
+
+try:
+    import aiofiles
+except ImportError:  # aiofiles is optional; file IO falls back to worker threads
+    aiofiles = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Font family fragments (matched against the lowercased family name)
+_BOLD_FAM_RE = re.compile(r'bold|heading|heavy|black')
+_SANS_RE = re.compile(r'arial|helvetica')
+
+# Files being read, labeled or written at once by process_output_folder
+_MAX_IN_FLIGHT = 32
+
+# Shared default for objects without a bbox (never mutated)
+_ZERO_BBOX = (0.0, 0.0, 0.0, 0.0)
+
+# Label codes returned by _score_and_label, indexed by code
+_LEVEL_NAMES = ('p', 'H1', 'H2', 'H3', 'title')
+
+def _has_no_words(text):
+    """True for page numbers and other text without any letters."""
+    return text.isdigit() or not any(c.isalpha() for c in text)
+
+# Alignment codes for _score_and_label (anything else is 0)
+_ALIGN_CODES = {'center': 1, 'left': 2}
+
+@njit(cache=True)
+def _score_and_label(fs, bold, bold_ratio, line_height, has_bold_family, is_sans,
+                     is_upper, is_title_case, align_code, y_top, text_len, no_words,
+                     is_title_obj, below_title, h1_threshold, h2_threshold, h3_threshold):
+    """Header score and initial label code (see _LEVEL_NAMES) for every object.
+
+    Thresholds must be ordered H1 >= H2 >= H3. The score is accumulated in the
+    same order as the original scalar formula, so labels do not drift at the
+    tier boundaries.
+    """
+    n = fs.shape[0]
+    codes = np.zeros(n, dtype=np.int8)
+    max_threshold = max(h1_threshold, 1.0)
+    for i in range(n):
+        if is_title_obj[i]:
+            codes[i] = 4
+            continue
+        # Page numbers and other trivial text, or whole paragraphs of body text
+        if below_title[i] or (text_len[i] <= 3 and no_words[i]) or text_len[i] > 350:
+            continue
+        score = (fs[i] / max_threshold) * 30
+        if bold[i]:
+            score += 25
+        score += bold_ratio[i] * 20
+        if has_bold_family[i]:
+            score += 15
+        elif is_sans[i]:
+            score += 5
+        if line_height[i] > 0:
+            score += min(line_height[i] / 20, 1.0) * 10
+        if is_upper[i]:
+            score += 10
+        elif is_title_case[i]:
+            score += 8
+        if align_code[i] == 1:
+            score += 10
+        elif align_code[i] == 2:
+            score += 7
+        if y_top[i] < 150:
+            score += 7
+        elif y_top[i] < 400:
+            score += 5
+        # Score tiers: >=65 and 45-65 follow the size ladder, 25-45 needs bold too
+        high = score >= 65
+        mid = score >= 45 and not high
+        headerish = high or mid or (score >= 25 and bold[i])
+        if headerish and h1_threshold > 0 and fs[i] >= h1_threshold:
+            codes[i] = 1
+        elif headerish and h2_threshold > 0 and fs[i] >= h2_threshold:
+            codes[i] = 2
+        elif ((headerish and h3_threshold > 0 and fs[i] >= h3_threshold) or
+              (high and score >= 75) or (mid and score >= 55 and bold[i])):
+            codes[i] = 3
+    return codes
+
+def calculate_enhanced_features(obj):
+    """Per-object heading features; computed once per object and then vectorized."""
+    get = obj.get
+    text = get('text', '').strip()
+    font_size = get('relative_font_size', 0)
+    is_bold = get('is_bold', False)
+    bold_ratio = get('bold_ratio', 0)
+    avg_line_height = get('avg_line_height', 0)
+    text_case = get('text_case', '')
+    alignment = get('alignment', '').lower()
+    bbox = get('bbox') or _ZERO_BBOX
+    font_family = ''
+    primary_font_family = get("primary_font_family", [])
+    if isinstance(primary_font_family, list) and primary_font_family:
+        font_family = str(primary_font_family[0]) or ""
+    elif isinstance(primary_font_family, str) and primary_font_family:
+        font_family = primary_font_family
+    else:
+        font_names = get("font_names", [])
+        if isinstance(font_names, list) and font_names:
+            font_family = str(font_names[0]) or ""
+        elif isinstance(font_names, str) and font_names:
+            font_family = font_names
+    font_family = font_family.lower()
+    features = {
+        'font_size': font_size,
+        'is_bold': is_bold,
+        'bold_ratio': bold_ratio,
+        'avg_line_height': avg_line_height,
+        'has_bold_family': bool(_BOLD_FAM_RE.search(font_family)),
+        'is_sans_family': bool(_SANS_RE.search(font_family)),
+        'is_uppercase': text_case == 'UPPER',
+        'is_title_case': text_case == 'Title',
+        'text_length': len(text),
+        'alignment': alignment,
+        'bbox': bbox,
+        'font_family': font_family
+    }
+    return features
+
 class DocumentLabeler:
     def __init__(self):
         self.processed_count = 0
         self.failed_count = 0
 
-    def label_document_hierarchy(self, json_data):
+    def label_document_hierarchy(self, json_data, copy=False):
+        # Labels are written onto the objects of json_data (the title slot is
+        # replaced by the merged title object); pass copy=True to leave
+        # json_data untouched and get fresh dicts back.
         if not json_data:
             return json_data
+        if copy:
+            json_data = [obj.copy() if isinstance(obj, dict) else obj for obj in json_data]
 
-        all_objects = [obj for obj in json_data if isinstance(obj, dict)]
+        # One pass for the objects, the lowest page number and its objects.
+        # Objects without a page_num count as page 1 but don't set the lowest page.
+        all_objects = []
+        lowest_page_num = None
+        first_page_objects = []
+        page_one_objects = []
+        for obj in json_data:
+            if not isinstance(obj, dict):
+                continue
+            all_objects.append(obj)
+            page_num = obj.get('page_num')
+            if page_num is None:
+                if 'page_num' not in obj:
+                    page_one_objects.append(obj)
+                continue
+            if page_num == 1:
+                page_one_objects.append(obj)
+            if lowest_page_num is None or page_num < lowest_page_num:
+                lowest_page_num = page_num
+                first_page_objects = [obj]
+            elif page_num == lowest_page_num:
+                first_page_objects.append(obj)
         if not all_objects:
             return json_data
-
-        page_numbers = [obj.get('page_num', 1) for obj in all_objects if obj.get('page_num') is not None]
-        lowest_page_num = min(page_numbers) if page_numbers else 1
+        if lowest_page_num is None:
+            lowest_page_num = 1
+        if lowest_page_num == 1:
+            first_page_objects = page_one_objects
         print(f"📄 Lowest page number found: {lowest_page_num}")
-        first_page_objects = [obj for obj in all_objects if obj.get('page_num', 1) == lowest_page_num]
 
         # 1. Title logic
         title_candidate = None
+        title_src_obj = None
+        title_member_ids = set()
         title_max_font_size = None
         if first_page_objects:
-            title_candidates = [
-                obj for obj in first_page_objects
-                if (obj.get('relative_font_size', 0) > 0 and
-                    len(obj.get('text', '').strip()) > 5 and
-                    len(obj.get('text', '').strip()) < 200 and
-                    not obj.get('text', '').strip().isdigit())
-            ]
+            title_candidates = []
+            for obj in first_page_objects:
+                if obj.get('relative_font_size', 0) > 0:
+                    text = obj.get('text', '').strip()
+                    if 5 < len(text) < 200 and not text.isdigit():
+                        title_candidates.append(obj)
             if title_candidates:
                 title_max_font_size = max(obj.get('relative_font_size', 0) for obj in title_candidates)
                 max_font_objs = [obj for obj in title_candidates if obj.get('relative_font_size', 0) == title_max_font_size]
@@ -47,236 +197,133 @@ class DocumentLabeler:
                         tuple(obj.get('primary_font_family') or []),
                         obj.get('is_bold', False),
                     )
-                clusters = {}
-                for obj in max_font_objs:
-                    k = title_feats(obj)
-                    clusters.setdefault(k, []).append(obj)
-                largest_cluster = max(clusters.values(), key=len)
-                merged_text = " ".join(obj.get('text', '').strip() for obj in largest_cluster if obj.get('text', '').strip())
+                # Most common feature key wins; ties go to the first key seen, as before
+                keys = [title_feats(obj) for obj in max_font_objs]
+                winning_key = Counter(keys).most_common(1)[0][0]
+                largest_cluster = [obj for obj, k in zip(max_font_objs, keys) if k == winning_key]
+                texts = (obj.get('text', '').strip() for obj in largest_cluster)
+                merged_text = " ".join(text for text in texts if text)
                 merged_title_obj = largest_cluster[0].copy()
                 merged_title_obj['text'] = merged_text
                 if len(largest_cluster) > 1:
-                    bboxes = [obj.get('bbox', [0, 0, 0, 0]) for obj in largest_cluster]
-                    merged_title_obj['bbox'] = [
-                        float(np.mean([b[0] for b in bboxes])),
-                        float(np.mean([b[1] for b in bboxes])),
-                        float(np.mean([b[2] for b in bboxes])),
-                        float(np.mean([b[3] for b in bboxes]))
-                    ]
+                    bbox_arr = np.asarray([obj.get('bbox') or _ZERO_BBOX for obj in largest_cluster],
+                                          dtype=np.float64)
+                    merged_title_obj['bbox'] = bbox_arr.mean(axis=0).tolist()
                 title_candidate = merged_title_obj
+                # The merged copy never equals a source object, so match by identity
+                title_src_obj = largest_cluster[0]
+                # Every line merged into the title, matched by identity as well
+                title_member_ids = {id(obj) for obj in largest_cluster}
         if title_candidate:
             title_text = title_candidate.get('text', '')
             short_title_text = title_text[:50] + "..." if len(title_text) > 50 else title_text
             print(f"🏷️ Title detected on page {lowest_page_num}: \"{short_title_text}\"")
 
         # 2. Thresholds
-        font_sizes = [
-            obj.get('relative_font_size', 0)
-            for obj in all_objects if obj.get('relative_font_size', 0) > 0
-            and (title_candidate is None or obj != title_candidate)
-        ]
-        if not font_sizes:
-            for obj in json_data:
+        font_sizes_np = np.fromiter(
+            (obj.get('relative_font_size', 0)
+             for obj in all_objects if obj.get('relative_font_size', 0) > 0
+             and id(obj) not in title_member_ids),
+            dtype=np.float64
+        )
+        if not font_sizes_np.size:
+            for idx, obj in enumerate(json_data):
                 if isinstance(obj, dict):
-                    if title_candidate and obj == title_candidate:
-                        obj['level'] = 'title'
+                    if obj is title_src_obj:
+                        title_candidate['level'] = 'title'
+                        json_data[idx] = title_candidate
                     else:
                         obj['level'] = 'p'
             return json_data
-        font_sizes_np = np.array(font_sizes)
         if len(font_sizes_np) >= 4:
-            h1_threshold = np.percentile(font_sizes_np, 90)
-            h2_threshold = np.percentile(font_sizes_np, 75)
-            h3_threshold = np.percentile(font_sizes_np, 60)
+            # One partition for all three cut points instead of one per percentile
+            h1_threshold, h2_threshold, h3_threshold = np.quantile(font_sizes_np, [0.9, 0.75, 0.6])
         else:
-            unique_font_sizes = sorted(set(font_sizes), reverse=True)
-            if len(unique_font_sizes) >= 3:
-                h1_threshold, h2_threshold, h3_threshold = unique_font_sizes[:3]
-            elif len(unique_font_sizes) == 2:
-                h1_threshold, h2_threshold = unique_font_sizes
-                h3_threshold = 0
-            elif len(unique_font_sizes) == 1:
-                h1_threshold = unique_font_sizes[0]
-                h2_threshold = 0
-                h3_threshold = 0
-            else:
-                h1_threshold = h2_threshold = h3_threshold = 0
+            # Up to three distinct sizes, largest first, padded with 0
+            top_sizes = np.unique(font_sizes_np)[::-1][:3].tolist() + [0, 0]
+            h1_threshold, h2_threshold, h3_threshold = top_sizes[:3]
         print(f"📊 Font size thresholds - H1: {h1_threshold}, H2: {h2_threshold}, H3: {h3_threshold}")
 
-        def calculate_enhanced_features(obj):
-            text = obj.get('text', '').strip()
-            font_size = obj.get('relative_font_size', 0)
-            is_bold = obj.get('is_bold', False)
-            bold_ratio = obj.get('bold_ratio', 0)
-            avg_line_height = obj.get('avg_line_height', 0)
-            text_case = obj.get('text_case', '')
-            alignment = obj.get('alignment', '').lower()
-            bbox = obj.get('bbox', [0, 0, 0, 0])
-            font_family = ''
-            primary_font_family = obj.get("primary_font_family", [])
-            if isinstance(primary_font_family, list) and primary_font_family:
-                font_family = str(primary_font_family[0]) or ""
-            elif isinstance(primary_font_family, str) and primary_font_family:
-                font_family = primary_font_family
-            else:
-                font_names = obj.get("font_names", [])
-                if isinstance(font_names, list) and font_names:
-                    font_family = str(font_names[0]) or ""
-                elif isinstance(font_names, str) and font_names:
-                    font_family = font_names
-            font_family = font_family.lower()
-            features = {
-                'font_size': font_size,
-                'is_bold': is_bold,
-                'bold_ratio': bold_ratio,
-                'avg_line_height': avg_line_height,
-                'has_bold_family': any(k in font_family for k in ['bold', 'heading', 'heavy', 'black']),
-                'is_uppercase': text_case == 'UPPER',
-                'is_title_case': text_case == 'Title',
-                'text_length': len(text),
-                'alignment': alignment,
-                'bbox': bbox,
-                'font_family': font_family
-            }
-            return features
-
-        def calculate_header_score(obj, h1_threshold, h2_threshold, h3_threshold):
-            features = calculate_enhanced_features(obj)
-            score = 0
-            max_threshold = max(h1_threshold, h2_threshold, h3_threshold, 1)
-            font_size_ratio = features['font_size'] / max_threshold
-            score += font_size_ratio * 30
-            if features['is_bold']:
-                score += 25
-            score += features['bold_ratio'] * 20
-            if features['has_bold_family']:
-                score += 15
-            elif 'arial' in features['font_family'] or 'helvetica' in features['font_family']:
-                score += 5
-            if features['avg_line_height'] > 0:
-                score += min(features['avg_line_height'] / 20, 1) * 10
-            if features['is_uppercase']:
-                score += 10
-            elif features['is_title_case']:
-                score += 8
-            if features['alignment'] == 'center':
-                score += 10
-            elif features['alignment'] == 'left':
-                score += 7
-            bbox = features['bbox']
-            y_top = bbox[1] if bbox and len(bbox) > 1 else 0
-            if y_top < 150:
-                score += 7
-            elif y_top < 400:
-                score += 5
-            return score
-
-        initial_labels = [None] * len(json_data)
-        def assign_enhanced_level(idx, obj):
-            if not isinstance(obj, dict):
-                return 'p'
-            if title_candidate:
-                if obj == title_candidate:
-                    return 'title'
-                if obj.get('page_num', 1) == lowest_page_num:
-                    if obj.get('relative_font_size', 0) < title_max_font_size:
-                        return 'p'
-            features = calculate_enhanced_features(obj)
-            font_size = features['font_size']
-            text = obj.get('text', '')
-            if features['text_length'] <= 3 and (text.isdigit() or not any(c.isalpha() for c in text)):
-                return 'p'
-            if features['text_length'] > 350:
-                return 'p'
-            header_score = calculate_header_score(obj, h1_threshold, h2_threshold, h3_threshold)
-            if header_score >= 65:
-                if font_size >= h1_threshold and h1_threshold > 0:
-                    return 'H1'
-                elif font_size >= h2_threshold and h2_threshold > 0:
-                    return 'H2'
-                elif font_size >= h3_threshold and h3_threshold > 0:
-                    return 'H3'
-                elif header_score >= 75:
-                    return 'H3'
-                else:
-                    return 'p'
-            elif 45 <= header_score < 65:
-                if font_size >= h1_threshold and h1_threshold > 0:
-                    return 'H1'
-                elif font_size >= h2_threshold and h2_threshold > 0:
-                    return 'H2'
-                elif font_size >= h3_threshold and h3_threshold > 0:
-                    return 'H3'
-                elif header_score >= 55 and features['is_bold']:
-                    return 'H3'
-                else:
-                    return 'p'
-            elif 25 <= header_score < 45:
-                if font_size >= h1_threshold and h1_threshold > 0 and features['is_bold']:
-                    return 'H1'
-                elif font_size >= h2_threshold and h2_threshold > 0 and features['is_bold']:
-                    return 'H2'
-                elif font_size >= h3_threshold and h3_threshold > 0 and features['is_bold']:
-                    return 'H3'
-                else:
-                    return 'p'
-            else:
-                return 'p'
-
-        labeled_data = []
-        for idx, obj in enumerate(json_data):
-            if isinstance(obj, dict):
-                label = assign_enhanced_level(idx, obj)
-                initial_labels[idx] = label
-                labeled_obj = obj.copy()
-                labeled_obj['level'] = label
-                labeled_data.append(labeled_obj)
-            else:
-                labeled_data.append(obj)
-
-        for idx, (obj, label) in enumerate(zip(labeled_data, initial_labels)):
-            if not isinstance(obj, dict) or label in ['H1', 'H2', 'H3', 'title']:
-                continue
-            features = calculate_enhanced_features(obj)
-            next_idx = idx + 1
-            if next_idx < len(labeled_data):
-                next_obj = labeled_data[next_idx]
-                next_label = initial_labels[next_idx]
-                if (isinstance(next_obj, dict) and
-                    next_label == "p" and
-                    features['is_bold'] and features['font_size'] >= h3_threshold and features['font_size'] > 0):
-                    labeled_data[idx]['level'] = 'H3'
-
-        labeled_data = self._ensure_logical_hierarchy(labeled_data)
-        return labeled_data
-
-    def _ensure_logical_hierarchy(self, labeled_data):
-        seen_title = False
+        # 3. Struct-of-arrays features: one featurization pass, then one compiled scoring loop
+        features = [calculate_enhanced_features(obj) for obj in all_objects]
+        n = len(all_objects)
+        fs = np.fromiter((f['font_size'] for f in features), dtype=np.float64, count=n)
+        bold = np.fromiter((bool(f['is_bold']) for f in features), dtype=bool, count=n)
+        bold_ratio = np.fromiter((f['bold_ratio'] for f in features), dtype=np.float64, count=n)
+        line_height = np.fromiter((f['avg_line_height'] for f in features), dtype=np.float64, count=n)
+        text_len = np.fromiter((f['text_length'] for f in features), dtype=np.int64, count=n)
+        y_top = np.fromiter((f['bbox'][1] if len(f['bbox']) > 1 else 0 for f in features),
+                            dtype=np.float64, count=n)
+        has_bold_family = np.fromiter((f['has_bold_family'] for f in features), dtype=bool, count=n)
+        is_sans = np.fromiter((f['is_sans_family'] for f in features), dtype=bool, count=n)
+        is_upper = np.fromiter((f['is_uppercase'] for f in features), dtype=bool, count=n)
+        is_title_case = np.fromiter((f['is_title_case'] for f in features), dtype=bool, count=n)
+        align_code = np.fromiter((_ALIGN_CODES.get(f['alignment'], 0) for f in features), dtype=np.int8, count=n)
+        
+        # Objects that can never be headers
+        is_title_obj = np.fromiter((obj is title_src_obj for obj in all_objects), dtype=bool, count=n)
+        # The other title lines are already part of the merged title
+        below_title = np.fromiter((id(obj) in title_member_ids for obj in all_objects), dtype=bool, count=n)
+        below_title &= ~is_title_obj
+        if title_candidate:
+            page = np.fromiter((obj.get('page_num', 1) for obj in all_objects), dtype=np.float64, count=n)
+            below_title |= (page == lowest_page_num) & (fs < title_max_font_size)
+        no_words = np.fromiter((_has_no_words(obj.get('text', '')) for obj in all_objects), dtype=bool, count=n)
+        
+        codes = _score_and_label(fs, bold, bold_ratio, line_height, has_bold_family, is_sans,
+                                 is_upper, is_title_case, align_code, y_top, text_len, no_words,
+                                 is_title_obj, below_title,
+                                 float(h1_threshold), float(h2_threshold), float(h3_threshold))
+        labels = [_LEVEL_NAMES[code] for code in codes.tolist()]
+        
+        # 4. Single forward pass: neighbour promotion, logical hierarchy and output.
+        # Initial labels are all known up front, so the promotion lookahead is a
+        # plain index into `labels`.
+        promote = (bold & (fs >= h3_threshold) & (fs > 0)).tolist()
         seen_h1 = False
         seen_h2 = False
-        for obj in labeled_data:
+        pos = 0
+        last_idx = len(json_data) - 1
+        for idx, obj in enumerate(json_data):
             if not isinstance(obj, dict):
                 continue
-            current_label = obj.get('level', 'p')
-            if current_label == 'title':
-                seen_title = True
-            elif current_label == 'H1':
+            label = labels[pos]
+            
+            # Secondary title lines stay body text so they never reach the outline
+            if id(obj) in title_member_ids and obj is not title_src_obj:
+                pos += 1
+                obj['level'] = 'p'
+                continue
+            
+            # Promote bold, large-enough paragraphs that are followed by body text
+            if (label == 'p' and promote[pos] and idx < last_idx and
+                    isinstance(json_data[idx + 1], dict) and labels[pos + 1] == 'p'):
+                label = 'H3'
+            pos += 1
+            
+            # Keep the hierarchy logical: no H2 before an H1, no H3 before an H2
+            if label == 'H1':
                 seen_h1 = True
-            elif current_label == 'H2':
+            elif label == 'H2':
                 if not seen_h1:
-                    obj['level'] = 'H1'
+                    label = 'H1'
                     seen_h1 = True
                 else:
                     seen_h2 = True
-            elif current_label == 'H3':
+            elif label == 'H3':
                 if not seen_h2:
                     if seen_h1:
-                        obj['level'] = 'H2'
+                        label = 'H2'
                         seen_h2 = True
                     else:
-                        obj['level'] = 'H1'
+                        label = 'H1'
                         seen_h1 = True
-        return labeled_data
+            
+            # The title is emitted as the merged multi-line title object
+            if obj is title_src_obj:
+                obj = json_data[idx] = title_candidate
+            obj['level'] = label
+        return json_data
 
     def transform_to_schema(self, labeled_data):
         title = ""
@@ -302,24 +349,18 @@ class DocumentLabeler:
         }
         return result
 
+    def label_in_memory(self, json_data):
+        """Label extracted objects and return the schema dict without touching disk"""
+        return self.transform_to_schema(self.label_document_hierarchy(json_data))
+
     def process_single_file(self, json_file_path):
         """Process a single JSON file and overwrite in-place in outputs folder"""
         try:
-            with open(json_file_path, 'r', encoding='utf-8') as file:
-                json_data = json.load(file)
-            labeled_data = self.label_document_hierarchy(json_data)
-            schema_data = self.transform_to_schema(labeled_data)
+            json_data = load_json(json_file_path)
+            schema_data = self.label_in_memory(json_data)
             # Overwrite the SAME file in-place
-            with open(json_file_path, 'w', encoding='utf-8') as file:
-                json.dump(schema_data, file, indent=2, ensure_ascii=False)
-            title_found = "✓" if schema_data.get('title') else "✗"
-            outline_count = len(schema_data.get('outline', []))
-            if schema_data.get('outline'):
-                level_counts = Counter(item['level'] for item in schema_data['outline'])
-                logger.info(f" Title: {title_found}, Outline items: {outline_count}")
-                logger.info(f" Levels: {dict(level_counts)}")
-            else:
-                logger.info(f" Title: {title_found}, Outline items: {outline_count}")
+            dump_json(schema_data, json_file_path)
+            _log_schema_stats(_schema_stats(schema_data))
             self.processed_count += 1
             return True
         except Exception as e:
@@ -329,6 +370,10 @@ class DocumentLabeler:
 
     def process_output_folder(self, output_folder_path, file_pattern="*.json"):
         """Process all JSON files in the output folder and overwrite originals"""
+        return asyncio.run(self.process_output_folder_async(output_folder_path, file_pattern))
+
+    async def process_output_folder_async(self, output_folder_path, file_pattern="*.json"):
+        """Async process_output_folder: file IO overlaps with labeling in worker processes"""
         output_path = Path(output_folder_path)
         if not output_path.exists():
             logger.error(f"Output folder does not exist: {output_folder_path}")
@@ -340,12 +385,37 @@ class DocumentLabeler:
         logger.info(f"Found {len(json_files)} JSON files to process")
         self.processed_count = 0
         self.failed_count = 0
-        for json_file in json_files:
-            logger.info(f"Processing: {json_file.name}")
-            success = self.process_single_file(json_file)
+        # Files are independent, so label them in parallel worker processes
+        workers = min(os.cpu_count() or 1, len(json_files))
+        if workers > 1:
+            executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            executor = ThreadPoolExecutor(max_workers=1)
+        loop = asyncio.get_running_loop()
+        in_flight = asyncio.Semaphore(_MAX_IN_FLIGHT)
+
+        async def label_file(json_file):
+            async with in_flight:
+                try:
+                    raw = await _read_bytes(json_file)
+                    out, stats = await loop.run_in_executor(executor, _label_raw, raw)
+                    # Overwrite the SAME file in-place
+                    await _write_bytes(json_file, out)
+                except Exception as e:
+                    logger.error(f"❌ Failed to process {json_file}: {str(e)}")
+                    return False
+            logger.info(f"Labeled: {json_file.name}")
+            _log_schema_stats(stats)
+            return True
+
+        with executor:
+            results = await asyncio.gather(*[label_file(json_file) for json_file in json_files])
+        for json_file, success in zip(json_files, results):
             if success:
+                self.processed_count += 1
                 logger.info(f"✅ Successfully processed: {json_file.name}")
             else:
+                self.failed_count += 1
                 logger.error(f"❌ Failed to process: {json_file.name}")
         total_files = len(json_files)
         logger.info(f"\n=== PROCESSING SUMMARY ===")
@@ -355,3 +425,32 @@ class DocumentLabeler:
         logger.info(f"Success rate: {(self.processed_count/total_files)*100:.1f}%")
         logger.info(f"Files overwritten in-place in: {output_path}")
         return self.failed_count == 0
+
+def _schema_stats(schema_data):
+    outline = schema_data.get('outline', [])
+    level_counts = dict(Counter(item['level'] for item in outline))
+    return ("✓" if schema_data.get('title') else "✗"), len(outline), level_counts
+
+def _log_schema_stats(stats):
+    title_found, outline_count, level_counts = stats
+    logger.info(f" Title: {title_found}, Outline items: {outline_count}")
+    if level_counts:
+        logger.info(f" Levels: {level_counts}")
+
+def _label_raw(raw):
+    """Executor task: raw JSON bytes in, schema JSON bytes and stats out (module-level so it pickles)."""
+    schema_data = DocumentLabeler().label_in_memory(loads_json(raw))
+    return dumps_json(schema_data), _schema_stats(schema_data)
+
+async def _read_bytes(path):
+    if aiofiles is None:
+        return await asyncio.to_thread(Path(path).read_bytes)
+    async with aiofiles.open(path, 'rb') as f:
+        return await f.read()
+
+async def _write_bytes(path, data):
+    if aiofiles is None:
+        await asyncio.to_thread(Path(path).write_bytes, data)
+        return
+    async with aiofiles.open(path, 'wb') as f:
+        await f.write(data)
@@ -1,7 +1,35 @@
 import fitz  # PyMuPDF
+import os
+from contextlib import contextmanager
 
-def detect_pdf_type(pdf_path):
-    doc = fitz.open(pdf_path)
-    sample_page = doc[0]
-    text = sample_page.get_text().strip()
-    return "scanned" if not text else "layout"
+# Documents currently open through open_pdf, keyed by (path, mtime): [doc, users]
+_open_docs = {}
+
+@contextmanager
+def open_pdf(pdf_path):
+    """Open a PDF once and share the handle with nested open_pdf() calls.
+
+    The document is closed when the outermost context exits.
+    """
+    key = (os.path.abspath(pdf_path), os.path.getmtime(pdf_path))
+    entry = _open_docs.get(key)
+    if entry is None:
+        entry = _open_docs[key] = [fitz.open(pdf_path), 0]
+    entry[1] += 1
+    try:
+        yield entry[0]
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0:
+            del _open_docs[key]
+            entry[0].close()
+
+def detect_pdf_type(pdf_path, doc=None):
+    if doc is None:
+        with fitz.open(pdf_path) as doc:
+            return detect_pdf_type(pdf_path, doc=doc)
+    # Stop at the first text block (type 0) with a non-whitespace character
+    for block in doc[0].get_text("blocks"):
+        if block[6] == 0 and block[4] and not block[4].isspace():
+            return "layout"
+    return "scanned"
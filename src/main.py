@@ -1,10 +1,11 @@
 import os
-import json
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from loader import detect_pdf_type
+from loader import detect_pdf_type, open_pdf
 from extract_layout import extract_layout_text
 from extract_ocr import extract_ocr_text
 from labeler import DocumentLabeler
+from utils import load_json, dump_json
 
 INPUT_DIR = "inputs"
 OUTPUT_DIR = "outputs"
@@ -12,42 +13,42 @@ OUTPUT_DIR = "outputs"
 # Ensure the outputs directory exists
 Path(OUTPUT_DIR).mkdir(exist_ok=True)
 
-# Initialize the labeler once for efficiency
-labeler = DocumentLabeler()
+def process_pdf(pdf_path, page_workers=None):
+    """Process a single PDF through extraction and labeling pipeline
 
-def process_pdf(pdf_path):
-    """Process a single PDF through extraction and labeling pipeline"""
+    page_workers limits per-document parallelism (pages / OCR threads);
+    None keeps the extractors' defaults.
+    """
+    # Each call (and each worker process) gets its own labeler
+    labeler = DocumentLabeler()
+    worker_kwargs = {} if page_workers is None else {"num_workers": page_workers}
     print(f"🔍 Analyzing: {pdf_path}")
-    pdf_type = detect_pdf_type(pdf_path)
-    print(f"📘 Detected type: {pdf_type}")
-    # Step 1: Extract content based on PDF type
-    if pdf_type == "scanned":
-        result = extract_ocr_text(pdf_path)
-    else:
-        result = extract_layout_text(pdf_path)
-    # Step 2: Save initial extraction
+    # Parse the PDF once and share it between detection and extraction
+    with open_pdf(pdf_path) as doc:
+        pdf_type = detect_pdf_type(pdf_path, doc=doc)
+        print(f"📘 Detected type: {pdf_type}")
+        # Step 1: Extract content based on PDF type
+        if pdf_type == "scanned":
+            result = extract_ocr_text(pdf_path, doc=doc, **worker_kwargs)
+        else:
+            result = extract_layout_text(pdf_path, doc=doc, **worker_kwargs)
     out_path = Path(OUTPUT_DIR) / (Path(pdf_path).stem + ".json")
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(result, f, indent=2, ensure_ascii=False)
-    print(f"📄 Extraction saved to: {out_path}")
-    # Step 3: Apply hierarchical labeling and overwrite JSON
+    # Step 2: Apply hierarchical labeling in memory and write the schema once
     print(f"🏷️ Applying hierarchical labeling...")
     try:
-        labeling_success = labeler.process_single_file(out_path)
-        if labeling_success:
-            print(f"✅ Hierarchical labeling completed")
-            # Show quick stats for the file in-place
-            if out_path.exists():
-                with open(out_path, "r", encoding="utf-8") as f:
-                    final_data = json.load(f)
-                title_status = "✓" if final_data.get('title') else "✗"
-                outline_count = len(final_data.get('outline', []))
-                print(f"📊 Schema output - Title: {title_status}, Outline items: {outline_count}")
-                print(f"📁 File: {out_path}")
-        else:
-            print(f"⚠️ Hierarchical labeling failed for: {out_path}")
+        schema_data = labeler.label_in_memory(result)
     except Exception as e:
         print(f"❌ Labeling error for {pdf_path}: {str(e)}")
+        # Keep the raw extraction so it can be relabeled with --label-only
+        dump_json(result, out_path)
+        print(f"📄 Extraction saved to: {out_path}")
+    else:
+        dump_json(schema_data, out_path)
+        print(f"✅ Hierarchical labeling completed")
+        title_status = "✓" if schema_data.get('title') else "✗"
+        outline_count = len(schema_data.get('outline', []))
+        print(f"📊 Schema output - Title: {title_status}, Outline items: {outline_count}")
+        print(f"📁 File: {out_path}")
     print()  # Empty line for better readability
 
 def process_all_extracted_files():
@@ -57,7 +58,7 @@ def process_all_extracted_files():
     if not json_files:
         print("❌ No JSON files found in output directory.")
         return False
-    success = labeler.process_output_folder(OUTPUT_DIR)
+    success = DocumentLabeler().process_output_folder(OUTPUT_DIR)
     return success
 
 def main():
@@ -74,10 +75,16 @@ def main():
         print("❌ No PDFs found.")
         return
     print(f"🚀 Starting processing pipeline for {len(pdf_files)} PDF(s)...\n")
-    # Process each PDF through extraction and labeling
-    for file in pdf_files:
-        pdf_path = os.path.join(INPUT_DIR, file)
-        process_pdf(pdf_path)
+    # Process each PDF through extraction and labeling; PDFs are independent,
+    # so spread them over worker processes and keep each one single-worker inside
+    pdf_paths = [os.path.join(INPUT_DIR, file) for file in pdf_files]
+    workers = min(os.cpu_count() or 1, len(pdf_paths))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(process_pdf, pdf_paths, [1] * len(pdf_paths)))
+    else:
+        for pdf_path in pdf_paths:
+            process_pdf(pdf_path)
     print("🎉 All PDFs processed through complete pipeline!")
     # Optional: Show final summary
     show_final_summary()
@@ -94,8 +101,7 @@ def show_final_summary():
         total_outline_items = 0
         for output_file in output_files[:5]:
             try:
-                with open(output_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
+                data = load_json(output_file)
                 has_title = bool(data.get('title'))
                 outline_count = len(data.get('outline', []))
                 if has_title:
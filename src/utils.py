@@ -1 +1,35 @@
 # utils.py
+import json
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; compiled kernels then run as plain Python
+    def njit(*args, **kwargs):
+        return lambda func: func
+
+_ORJSON_OPTIONS = (orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) if orjson else 0
+
+def loads_json(raw):
+    """Parse JSON bytes or str, using orjson when available."""
+    return orjson.loads(raw) if orjson else json.loads(raw)
+
+def dumps_json(data):
+    """Serialize data to indented UTF-8 JSON bytes, using orjson when available."""
+    if orjson:
+        return orjson.dumps(data, option=_ORJSON_OPTIONS)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+
+def load_json(path):
+    """Read a JSON file, using orjson when available."""
+    with open(path, "rb") as f:
+        return loads_json(f.read())
+
+def dump_json(data, path):
+    """Write data as indented UTF-8 JSON, using orjson when available."""
+    with open(path, "wb") as f:
+        f.write(dumps_json(data))